@@ -1,8 +1,35 @@
+from functools import cached_property, lru_cache
+from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
+import logging
 import os
 
 
+# Sample catalog seeded by init_db as (name, price) pairs
+SAMPLE_PRODUCTS: Tuple[Tuple[str, float], ...] = (
+    ("Gaming Laptop", 999.99),
+    ("Wireless Mouse", 29.99),
+    ("Mechanical Keyboard", 89.99),
+    ("27-inch Monitor", 299.99),
+    ("Noise-Canceling Headphones", 199.99),
+    ("Webcam HD", 59.99),
+    ("USB-C Hub", 39.99),
+    ("External SSD 1TB", 149.99),
+    ("Gaming Mouse Pad", 19.99),
+    ("Laptop Stand", 24.99),
+)
+
+
+def _service_name_from_env() -> str:
+    """Read service.name from OTEL_RESOURCE_ATTRIBUTES, falling back to 'xcart'."""
+    for attribute in os.getenv("OTEL_RESOURCE_ATTRIBUTES", "").split(","):
+        key, _, value = attribute.partition("=")
+        if key.strip() == "service.name" and value.strip():
+            return value.strip()
+    return "xcart"
+
+
 class Settings(BaseSettings):
     # Application settings
     APP_NAME: str = "XCart Backend"
@@ -18,6 +45,7 @@ class Settings(BaseSettings):
     PORT: int = 8000
     RELOAD: bool = True
     WORKERS: int = 1
+    THREADPOOL_SIZE: int = 40  # Concurrent sync route handlers per worker (anyio default)
 
     # CORS settings
     CORS_ORIGINS: List[str] = ["*"]
@@ -31,37 +59,37 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     PASSWORD_BCRYPT_ROUNDS: int = 12
     OAUTH2_TOKEN_URL: str = "auth/login"
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
 
     # Database settings
     DATABASE_URL: str = "sqlite:///./xcart.db"
-    DATABASE_CONNECT_ARGS: Dict[str, Any] = {"check_same_thread": False}
+    DATABASE_CONNECT_ARGS: Dict[str, Any] = {"check_same_thread": False, "timeout": 30}
     DATABASE_ECHO: bool = False
+    AUTO_CREATE_SCHEMA: bool = True  # Disable where migrations own the schema
+    DATABASE_POOL_SIZE: int = 5
+    # Pool ceiling is max(DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW, THREADPOOL_SIZE)
+    DATABASE_MAX_OVERFLOW: int = 10  # WAL readers run in parallel, so keep burst headroom
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
 
     # Sample data settings
     INITIALIZE_DB: bool = True
-    SAMPLE_PRODUCTS: List[Dict[str, Any]] = [
-        {"name": "Gaming Laptop", "price": 999.99},
-        {"name": "Wireless Mouse", "price": 29.99},
-        {"name": "Mechanical Keyboard", "price": 89.99},
-        {"name": "27-inch Monitor", "price": 299.99},
-        {"name": "Noise-Canceling Headphones", "price": 199.99},
-        {"name": "Webcam HD", "price": 59.99},
-        {"name": "USB-C Hub", "price": 39.99},
-        {"name": "External SSD 1TB", "price": 149.99},
-        {"name": "Gaming Mouse Pad", "price": 19.99},
-        {"name": "Laptop Stand", "price": 24.99},
-    ]
+
+    # Product cache settings
+    PRODUCT_CACHE_MAXSIZE: int = 10_000
+    PRODUCT_CACHE_TTL_SECONDS: int = 60
 
     # Business logic settings
     MIN_ORDER_AMOUNT: float = 24.99
 
     # OpenTelemetry settings
     OTEL_ENABLED: bool = True
-    OTEL_SERVICE_NAME: str = os.getenv("OTEL_RESOURCE_ATTRIBUTES").split("=")[1]
+    OTEL_SERVICE_NAME: str = Field(default_factory=_service_name_from_env)
     OTEL_EXPORTER_OTLP_ENDPOINT: str = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "").strip()
     OTEL_EXPORTER_OTLP_HEADERS: str = os.getenv("OTEL_EXPORTER_OTLP_HEADERS", "").strip()
     OTEL_METRIC_EXPORT_INTERVAL_MS: int = 5000  # Increased to 5 seconds
     OTEL_METRIC_EXPORT_TIMEOUT: int = 10  # Increased timeout
+    OTEL_USER_BUCKETS: int = 16  # Per-user metrics are grouped into this many buckets, 0 labels by user_id
     DEPLOYMENT_ENV: str = os.getenv("DEPLOYMENT_ENV", "development")
 
     # Logging settings
@@ -73,37 +101,60 @@ class Settings(BaseSettings):
     LOG_FILE_MAX_BYTES: int = 10_485_760  # 10MB
     LOG_FILE_BACKUP_COUNT: int = 5
 
-    @property
+    @cached_property
     def otel_headers_dict(self) -> Dict[str, str]:
-        """Parse OTLP headers into a dictionary."""
+        """Parse OTLP headers into a dictionary (computed once)."""
         headers = {}
-        if self.OTEL_EXPORTER_OTLP_HEADERS:
-            for header in self.OTEL_EXPORTER_OTLP_HEADERS.split(","):
-                if "=" in header:
-                    key, value = header.split("=", 1)
-                    headers[key.strip()] = value.strip()
+        raw = self.OTEL_EXPORTER_OTLP_HEADERS
+        pos, end = 0, len(raw)
+        while pos < end:
+            comma = raw.find(",", pos)
+            if comma == -1:
+                comma = end
+            eq = raw.find("=", pos, comma)
+            if eq != -1:
+                headers[raw[pos:eq].strip()] = raw[eq + 1:comma].strip()
+            pos = comma + 1
         return headers
 
-    @property
+    @cached_property
     def otel_resource_attributes(self) -> Dict[str, Any]:
-        """Get OpenTelemetry resource attributes."""
+        """Get OpenTelemetry resource attributes (computed once)."""
         return {
             "service.name": self.OTEL_SERVICE_NAME,
             "service.version": self.APP_VERSION,
             "deployment.environment": self.DEPLOYMENT_ENV,
         }
 
-    def get_formatted_endpoint(self) -> str:
-        """Format the OTLP endpoint for gRPC."""
+    @cached_property
+    def log_level_int(self) -> int:
+        """Resolve LOG_LEVEL to its numeric logging level (computed once)."""
+        return logging.getLevelName(self.LOG_LEVEL)
+
+    @cached_property
+    def otel_grpc_endpoint(self) -> str:
+        """Format the OTLP endpoint for gRPC (computed once)."""
         endpoint = self.OTEL_EXPORTER_OTLP_ENDPOINT
         if endpoint.startswith(("http://", "https://")):
             endpoint = endpoint.split("://")[1]
         return endpoint
 
+    @cached_property
+    def otlp_exporter_kwargs(self) -> Dict[str, Any]:
+        """Get the connection kwargs shared by OTLP exporters (computed once)."""
+        return {
+            "endpoint": self.otel_grpc_endpoint,
+            "insecure": "localhost" in self.OTEL_EXPORTER_OTLP_ENDPOINT,
+            "headers": tuple(self.otel_headers_dict.items()),
+            "timeout": self.OTEL_METRIC_EXPORT_TIMEOUT,
+        }
+
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-# Create global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the settings instance, created on first use."""
+    return Settings()
@@ -1,23 +1,75 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .config import settings
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import DeclarativeBase, scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from .config import get_settings
 from .logging import get_logger
 
 logger = get_logger("database")
 
+settings = get_settings()
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256MB
+    "PRAGMA cache_size=-65536",  # 64MB
+)
+
+if settings.DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+    # In-memory databases only exist per connection, so share a single one
+    engine_kwargs = {"poolclass": StaticPool}
+else:
+    engine_kwargs = {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        # Each sync handler thread holds a session for its whole request, so the
+        # pool ceiling is max(pool_size + DATABASE_MAX_OVERFLOW, THREADPOOL_SIZE)
+        "max_overflow": max(
+            settings.DATABASE_MAX_OVERFLOW,
+            settings.THREADPOOL_SIZE - settings.DATABASE_POOL_SIZE,
+        ),
+        # Reuse the most recently returned connection so it stays warm
+        "pool_use_lifo": True,
+        "pool_pre_ping": True,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+    }
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=settings.DATABASE_CONNECT_ARGS,
     echo=settings.DATABASE_ECHO,
+    **engine_kwargs,
 )
 
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Apply WAL mode and cache pragmas to each new SQLite connection"""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, expire_on_commit=False
+)
+
+# Thread-local sessions for long-lived background workers (telemetry)
+ScopedSession = scoped_session(SessionLocal)
+
 
 # Create declarative base
-Base = declarative_base()
+class Base(DeclarativeBase):
+    pass
+
+
+def bulk_insert(db, model, rows, batch_size: int = 1000) -> None:
+    """Insert row dicts with one executemany INSERT per batch (caller commits)"""
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(model), rows[start:start + batch_size])
 
 
 def get_db():
@@ -1,7 +1,8 @@
 import logging
 import sys
+from functools import lru_cache
 from typing import Any, Dict
-from .config import settings
+from .config import get_settings
 
 
 class CustomFormatter(logging.Formatter):
@@ -24,21 +25,27 @@ class CustomFormatter(logging.Formatter):
             logging.ERROR: self.red + self.fmt + self.reset,
             logging.CRITICAL: self.bold_red + self.fmt + self.reset,
         }
+        # Index formatters by levelno // 10 (DEBUG=1 ... CRITICAL=5)
+        self._fmt_by_level = [None] * 6
+        for level, colored_fmt in self.FORMATS.items():
+            self._fmt_by_level[level // 10] = logging.Formatter(colored_fmt)
 
     def format(self, record: logging.LogRecord) -> str:
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt)
-        return formatter.format(record)
+        idx = record.levelno // 10
+        if not 0 < idx < 6:
+            idx = logging.INFO // 10
+        return self._fmt_by_level[idx].format(record)
 
 
 def setup_logging() -> None:
     """Setup logging configuration"""
+    settings = get_settings()
     logger = logging.getLogger(settings.OTEL_SERVICE_NAME)
-    logger.setLevel(getattr(logging, settings.LOG_LEVEL))
+    logger.setLevel(settings.log_level_int)
 
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, settings.LOG_LEVEL))
+    console_handler.setLevel(settings.log_level_int)
 
     # Format
     console_handler.setFormatter(CustomFormatter(settings.LOG_FORMAT))
@@ -47,9 +54,10 @@ def setup_logging() -> None:
     logger.addHandler(console_handler)
 
 
+@lru_cache(maxsize=256)
 def get_logger(name: str) -> logging.Logger:
-    """Get logger instance"""
-    return logging.getLogger(f"{settings.OTEL_SERVICE_NAME}.{name}")
+    """Get logger instance (memoized per name)"""
+    return logging.getLogger(f"{get_settings().OTEL_SERVICE_NAME}.{name}")
 
 
 def log_request_info(
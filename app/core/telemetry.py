@@ -1,144 +1,204 @@
 """OpenTelemetry instrumentation for application monitoring."""
 
+import sys
+import threading
+from collections import deque
+from grpc import Compression
+from functools import lru_cache
+from typing import Dict
 from opentelemetry import metrics
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
 from opentelemetry.sdk.resources import Resource
-from fastapi import FastAPI, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from time import time
-from sqlalchemy import func, and_, Column, Integer, String, DateTime
-from .config import settings
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from time import perf_counter_ns
+from sqlalchemy import func
+from .config import get_settings
+from .database import ScopedSession
 from .logging import get_logger
-from datetime import datetime, timedelta
+from app.models.models import CartItem
 
 logger = get_logger("telemetry")
 
+# How long the flusher batches buffered counter updates before aggregating
+# them into the SDK, and the backlog at which producers flush inline instead
+COUNTER_FLUSH_INTERVAL_S = 0.1
+COUNTER_FLUSH_THRESHOLD = 1000
+
+
+# Interned label values for the common HTTP methods and status codes; any
+# other client-supplied method is reported as OTHER_METHOD
+OTHER_METHOD = "OTHER"
+_METHODS = {
+    m: sys.intern(m)
+    for m in ("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS")
+}
+_STATUS_STR = tuple(str(code) for code in range(600))
+
+# Path label for requests that matched no route (scanners, typos), so raw
+# URLs never become series
+UNMATCHED_PATH = "<unmatched>"
+
+
+@lru_cache(maxsize=4096)
+def _request_attributes(method: str, path: str, status_code: int) -> Dict[str, str]:
+    """Get the shared attribute dict for a (method, path, status) combination."""
+    return {
+        "method": _METHODS.get(method, OTHER_METHOD),
+        "path": path,
+        "status_code": _STATUS_STR[status_code] if 0 <= status_code < 600 else str(status_code)
+    }
+
+
+@lru_cache(maxsize=4096)
+def _error_attributes(method: str, path: str, status_code: str, error_type: str) -> Dict[str, str]:
+    """Get the shared attribute dict for an error observation."""
+    return {
+        "method": method,
+        "path": path,
+        "status_code": status_code,
+        "error_type": error_type
+    }
+
+
+def _user_label(user_id: int) -> str:
+    """Get the label value a user's business metrics are reported under."""
+    buckets = get_settings().OTEL_USER_BUCKETS
+    # Bucketing keeps the number of series bounded as users grow
+    return str(user_id % buckets) if buckets > 0 else str(user_id)
+
+
+@lru_cache(maxsize=256)
+def _user_attributes(label: str) -> Dict[str, str]:
+    """Get the shared attribute dict for a per-user business metric label."""
+    key = "user_bucket" if get_settings().OTEL_USER_BUCKETS > 0 else "user_id"
+    return {key: label}
+
+
+@lru_cache(maxsize=1)
+def shared_resource() -> Resource:
+    """Get the OpenTelemetry resource shared by all providers."""
+    return Resource.create(get_settings().otel_resource_attributes)
+
+
+@lru_cache(maxsize=None)
+def metric_name(name: str) -> str:
+    """Get the service-prefixed name for a metric."""
+    return f"{get_settings().OTEL_SERVICE_NAME}_{name}"
+
+
+# Instruments created by Telemetry:
+# (attribute, kind, metric name, description, unit, observer method or None)
+_INSTRUMENT_SPECS = (
+    # Counter: Track error responses; cumulative, so backends sum it across
+    # workers and derive rates with rate()/increase()
+    ("error_count", "counter", "http_errors_total",
+     "Total number of HTTP error responses", "1", None),
+    # Histogram: Track request latency
+    ("request_latency", "histogram", "http_request_duration_seconds",
+     "HTTP request latency in seconds", "s", None),
+    # Gauge: Track cart items in real-time
+    ("cart_items", "observable_gauge", "cart_items_total",
+     "Current number of items in cart", "1", "_observe_cart_items"),
+    # Counter: Track value of placed orders
+    ("order_total", "counter", "order_total_amount",
+     "Total value of placed orders", "1", None),
+)
+
+
 class Telemetry:
     """Real-time metrics tracking."""
-    
+
+    __slots__ = (
+        "meter", "error_count", "request_latency", "cart_items", "order_total",
+        "_pending_orders", "_orders_ready", "_flush_stop", "_flusher",
+    )
+
     def __init__(self, meter):
         """Initialize telemetry with OpenTelemetry meter."""
         self.meter = meter
-        
-        # Observable Counter: Track error requests in real-time
-        self.error_count = self.meter.create_observable_counter(
-            name=f"{settings.OTEL_SERVICE_NAME}_http_errors_total",
-            description="Total number of HTTP error responses",
-            unit="1",
-            callbacks=[self._observe_errors]
-        )
-        
-        # Histogram: Track request latency
-        self.request_latency = self.meter.create_histogram(
-            name=f"{settings.OTEL_SERVICE_NAME}_http_request_duration_seconds",
-            description="HTTP request latency in seconds",
-            unit="s"
-        )
-        
-        # Gauge: Track cart items in real-time
-        self.cart_items = self.meter.create_observable_gauge(
-            name=f"{settings.OTEL_SERVICE_NAME}_cart_items_total",
-            description="Current number of items in cart",
-            unit="1",
-            callbacks=[self._observe_cart_items]
-        )
 
-        # Store errors in database
-        from app.core.database import Base, engine
-        class ErrorMetric(Base):
-            __tablename__ = "error_metrics"
-            id = Column(Integer, primary_key=True, index=True)
-            method = Column(String)
-            path = Column(String)
-            status_code = Column(Integer)
-            error_type = Column(String)
-            timestamp = Column(DateTime(timezone=True), server_default=func.now())
-        Base.metadata.create_all(bind=engine)
-        self.ErrorMetric = ErrorMetric
-
-    def _observe_errors(self, options):
-        """Real-time observer for error metrics from database."""
-        try:
-            from app.core.database import SessionLocal
-            
-            db = SessionLocal()
+        for attr, kind, name, description, unit, observer in _INSTRUMENT_SPECS:
+            factory = getattr(self.meter, f"create_{kind}")
+            kwargs = {"callbacks": [getattr(self, observer)]} if observer else {}
+            setattr(self, attr, factory(
+                name=metric_name(name),
+                description=description,
+                unit=unit,
+                **kwargs
+            ))
+
+        # Order amounts buffered by track_order and drained by the flusher thread
+        self._pending_orders = deque()
+        self._orders_ready = threading.Event()
+        self._flush_stop = threading.Event()
+        self._flusher = None
+
+    def start_flusher(self) -> None:
+        """Start the background thread that drains buffered counter updates."""
+        if self._flusher is None:
+            self._flush_stop.clear()
+            self._flusher = threading.Thread(
+                target=self._run_flusher, name="telemetry-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def stop_flusher(self) -> None:
+        """Stop the flusher thread and record anything still buffered."""
+        self._flush_stop.set()
+        self._orders_ready.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self._flush_orders()
+
+    def _run_flusher(self) -> None:
+        # Sleeps until an order is buffered, then waits one interval to batch
+        while True:
+            self._orders_ready.wait()
+            if self._flush_stop.wait(COUNTER_FLUSH_INTERVAL_S):
+                return
+            self._orders_ready.clear()
             try:
-                # Only count errors from the last minute
-                one_minute_ago = datetime.utcnow() - timedelta(minutes=1)
-                
-                # Get error counts grouped by method, path, status_code, and error_type
-                results = db.query(
-                    self.ErrorMetric.method,
-                    self.ErrorMetric.path,
-                    self.ErrorMetric.status_code,
-                    self.ErrorMetric.error_type,
-                    func.count().label('total')
-                ).filter(
-                    self.ErrorMetric.timestamp >= one_minute_ago
-                ).group_by(
-                    self.ErrorMetric.method,
-                    self.ErrorMetric.path,
-                    self.ErrorMetric.status_code,
-                    self.ErrorMetric.error_type
-                ).all()
-
-                # Return measurements for each error type
-                return [
-                    metrics.Observation(
-                        value=int(total),
-                        attributes={
-                            "method": method,
-                            "path": path,
-                            "status_code": str(status_code),
-                            "error_type": error_type
-                        }
-                    )
-                    for method, path, status_code, error_type, total in results
-                ] or [metrics.Observation(value=0, attributes={
-                    "method": "GET",
-                    "path": "/",
-                    "status_code": "200",
-                    "error_type": "none"
-                })]
-
-            finally:
-                db.close()
-        except Exception as e:
-            logger.error(f"Failed to observe errors: {str(e)}")
-            return [metrics.Observation(value=0, attributes={
-                "method": "GET",
-                "path": "/",
-                "status_code": "200",
-                "error_type": "none"
-            })]
+                self._flush_orders()
+            except Exception as e:
+                logger.error(f"Failed to flush order metrics: {e}")
+
+    def _flush_orders(self) -> None:
+        """Aggregate buffered order amounts per user label into single counter adds."""
+        pending = self._pending_orders
+        totals = {}
+        while pending:
+            user_id, amount = pending.popleft()
+            label = _user_label(user_id)
+            totals[label] = totals.get(label, 0) + amount
+        for label, amount in totals.items():
+            self.order_total.add(amount, _user_attributes(label))
 
     def _observe_cart_items(self, options):
         """Real-time observer for cart items from database."""
+        # Runs once per export interval on the reader thread, so reading the
+        # database keeps the gauge exact across workers and restarts
         try:
-            from app.core.database import SessionLocal
-            from app.models.models import CartItem
-            
-            db = SessionLocal()
-            try:
-                # Get current cart totals for all users
+            with ScopedSession() as db:
                 results = db.query(
                     CartItem.user_id,
-                    func.coalesce(func.sum(CartItem.quantity), 0).label('total')
+                    func.sum(CartItem.quantity).label('total')
                 ).group_by(CartItem.user_id).all()
-
-                # Return measurements for each user
-                return [
-                    metrics.Observation(value=int(total), attributes={"user_id": str(user_id)})
-                    for user_id, total in results
-                ] or [metrics.Observation(value=0, attributes={"user_id": "0"})]
-
-            finally:
-                db.close()
         except Exception as e:
             logger.error(f"Failed to observe cart items: {str(e)}")
-            return [metrics.Observation(value=0, attributes={"user_id": "0"})]
+            results = ()
+
+        totals = {}
+        for user_id, total in results:
+            label = _user_label(user_id)
+            totals[label] = totals.get(label, 0) + int(total or 0)
+        return [
+            metrics.Observation(value=total, attributes=_user_attributes(label))
+            for label, total in totals.items()
+        ] or [metrics.Observation(value=0, attributes=_user_attributes("0"))]
 
     def track_request(self, method: str, path: str, status_code: int, duration_seconds: float):
         """Track request metrics.
@@ -150,60 +210,90 @@ class Telemetry:
             duration_seconds: Request duration in seconds
         """
         # Track request latency
-        attributes = {
-            "method": method,
-            "path": path,
-            "status_code": str(status_code)
-        }
+        attributes = _request_attributes(method, path, status_code)
         self.request_latency.record(duration_seconds, attributes)
         
-        # Store errors in database for real-time tracking
+        # Count error responses
         if status_code >= 400:
-            try:
-                from app.core.database import SessionLocal
-                
-                error_type = "client" if status_code < 500 else "server"
-                db = SessionLocal()
-                try:
-                    error_metric = self.ErrorMetric(
-                        method=method,
-                        path=path,
-                        status_code=status_code,
-                        error_type=error_type
-                    )
-                    db.add(error_metric)
-                    db.commit()
-                    logger.info(f"Stored error metric: method={method}, path={path}, status={status_code}, type={error_type}")
-                finally:
-                    db.close()
-            except Exception as e:
-                logger.error(f"Failed to store error metric: {str(e)}")
+            self.error_count.add(1, _error_attributes(
+                attributes["method"], path, attributes["status_code"],
+                "client" if status_code < 500 else "server"
+            ))
 
+    def track_order(self, user_id: int, total_amount: float, items_count: int):
+        """Track a placed order.
 
-class TelemetryMiddleware(BaseHTTPMiddleware):
-    """Middleware for request telemetry."""
-    
-    async def dispatch(self, request: Request, call_next):
-        if not settings.OTEL_ENABLED:
-            return await call_next(request)
-            
-        start_time = time()
-        response = await call_next(request)
-        duration = time() - start_time
-        
-        if telemetry := get_telemetry():
-            telemetry.track_request(
-                method=request.method,
-                path=request.url.path,
-                status_code=response.status_code,
+        Args:
+            user_id: ID of the ordering user
+            total_amount: Order total
+            items_count: Number of items in the order
+        """
+        # deque.append is atomic, so the request path never waits on the SDK lock
+        self._pending_orders.append((user_id, total_amount))
+        if not self._orders_ready.is_set():
+            self._orders_ready.set()
+        # Bound the backlog if the flusher is not running (e.g. lost across a fork)
+        if len(self._pending_orders) >= COUNTER_FLUSH_THRESHOLD:
+            self._flush_orders()
+
+
+class _NoopTelemetry:
+    """Stand-in used when OpenTelemetry is disabled or not configured."""
+
+    __slots__ = ()
+
+    def track_request(self, method: str, path: str, status_code: int, duration_seconds: float):
+        pass
+
+    def track_order(self, user_id: int, total_amount: float, items_count: int):
+        pass
+
+
+class TelemetryMiddleware:
+    """Pure ASGI middleware for request telemetry."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Middleware is built after setup_telemetry, so resolve the instance once
+        self.telemetry = get_telemetry()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Only registered by setup_telemetry when OpenTelemetry is enabled
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_ns = perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Integer nanoseconds, converted once to the histogram's unit (seconds)
+            duration = (perf_counter_ns() - start_ns) / 1e9
+
+            # Label by route template (e.g. /cart/{item_id}) to bound cardinality
+            route = scope.get("route")
+            path = route.path if route is not None else UNMATCHED_PATH
+
+            self.telemetry.track_request(
+                method=scope["method"],
+                path=path,
+                status_code=status_code,
                 duration_seconds=duration
             )
-            
-        return response
 
 
 def setup_telemetry(app: FastAPI = None) -> None:
     """Initialize OpenTelemetry with unified configuration."""
+    global _telemetry, _meter_provider
+    settings = get_settings()
     if not settings.OTEL_ENABLED:
         logger.info("OpenTelemetry is disabled")
         return
@@ -213,30 +303,23 @@ def setup_telemetry(app: FastAPI = None) -> None:
         return
 
     try:
-        global _telemetry
-        
-        # Setup metrics with faster refresh
-        resource = Resource.create({
-            "service.name": settings.OTEL_SERVICE_NAME,
-            "service.version": settings.APP_VERSION
-        })
-
+        # Setup metrics export
         reader = PeriodicExportingMetricReader(
             OTLPMetricExporter(
-                endpoint=settings.get_formatted_endpoint(),
-                insecure=True if "localhost" in settings.OTEL_EXPORTER_OTLP_ENDPOINT else False,
-                headers=settings.otel_headers_dict,
-                timeout=5  # 5 second timeout
+                **settings.otlp_exporter_kwargs,
+                compression=Compression.Gzip
             ),
-            export_interval_millis=1000  # 1 second refresh
+            export_interval_millis=settings.OTEL_METRIC_EXPORT_INTERVAL_MS,
+            export_timeout_millis=settings.OTEL_METRIC_EXPORT_TIMEOUT * 1000
         )
 
         provider = MeterProvider(
             metric_readers=[reader],
-            resource=resource
+            resource=shared_resource()
         )
         
         metrics.set_meter_provider(provider)
+        _meter_provider = provider
         _telemetry = Telemetry(metrics.get_meter("xcart"))
         
         # Add telemetry middleware
@@ -249,9 +332,26 @@ def setup_telemetry(app: FastAPI = None) -> None:
         logger.error(f"Failed to initialize OpenTelemetry: {e}")
 
 
-# Global telemetry instance
-_telemetry = None
+def start_telemetry() -> None:
+    """Start per-process telemetry threads (run from the app lifespan)."""
+    if isinstance(_telemetry, Telemetry):
+        _telemetry.start_flusher()
+
+
+def shutdown_telemetry() -> None:
+    """Flush pending metrics and stop the exporter."""
+    if isinstance(_telemetry, Telemetry):
+        _telemetry.stop_flusher()
+    if _meter_provider is not None:
+        _meter_provider.shutdown()
+        logger.info("OpenTelemetry shut down")
+
+
+# Global telemetry instance, replaced once by setup_telemetry when enabled
+_telemetry: Telemetry | _NoopTelemetry = _NoopTelemetry()
+_meter_provider: MeterProvider | None = None
+
 
-def get_telemetry():
-    """Get the global telemetry instance."""
-    return _telemetry 
\ No newline at end of file
+def get_telemetry() -> Telemetry | _NoopTelemetry:
+    """Get the global telemetry instance (a no-op when telemetry is off)."""
+    return _telemetry
@@ -1,9 +1,14 @@
+from contextlib import asynccontextmanager
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import engine, SessionLocal
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.database import bulk_insert, engine, SessionLocal
 from app.core.logging import setup_logging, get_logger
-from app.core.telemetry import setup_telemetry
-from app.core.config import settings
+from app.core.telemetry import setup_telemetry, shutdown_telemetry, start_telemetry
+from app.core.config import get_settings, SAMPLE_PRODUCTS
 from app.models import models
 from app.routers import auth, products, cart, orders
 
@@ -11,36 +16,67 @@ from app.routers import auth, products, cart, orders
 setup_logging()
 logger = get_logger("app")
 
-# Create database tables
-logger.info("Creating database tables...")
-models.Base.metadata.create_all(bind=engine)
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
 
 
 def init_db():
     """Initialize database with sample products if enabled"""
+    settings = get_settings()
     if not settings.INITIALIZE_DB:
         logger.info("Database initialization skipped (INITIALIZE_DB=False)")
         return
 
     logger.info("Initializing database with sample products...")
-    db = SessionLocal()
-    if not db.query(models.Product).first():
-        for product in settings.SAMPLE_PRODUCTS:
-            db.add(models.Product(
-                name=product["name"],
-                price=product["price"]
-            ))
+    rows = [{"name": name, "price": price} for name, price in SAMPLE_PRODUCTS]
+    with SessionLocal() as db:
+        # Seed only an empty catalog, so products an operator deleted stay deleted
+        if db.query(models.Product).first():
+            logger.info("Products already present, skipping sample data")
+            return
+
+        upsert = UPSERT_INSERTS.get(engine.dialect.name)
+        if upsert is not None:
+            # Race-safe INSERT: workers starting together skip names another inserted
+            try:
+                db.execute(
+                    upsert(models.Product).on_conflict_do_nothing(index_elements=["name"]),
+                    rows,
+                )
+                db.commit()
+                logger.info("Sample products created successfully")
+                return
+            except SQLAlchemyError as e:
+                # Databases created before products.name became unique
+                db.rollback()
+                logger.warning(f"Sample product upsert failed, falling back: {e}")
+
+        # Batched executemany INSERTs rather than a flush per product
+        bulk_insert(db, models.Product, rows)
         db.commit()
         logger.info("Sample products created successfully")
-    db.close()
 
 
-# Initialize database
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run per-process startup and shutdown work"""
+    settings = get_settings()
+    # Sync routes run in anyio's worker threads; size the pool for blocking DB calls
+    to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_SIZE
+    if settings.AUTO_CREATE_SCHEMA:
+        logger.info("Creating database tables...")
+        models.Base.metadata.create_all(bind=engine)
+    init_db()
+    # Started here rather than in create_app so each forked worker gets its own thread
+    start_telemetry()
+    logger.info("Application startup complete")
+    yield
+    shutdown_telemetry()
 
 
 def create_app() -> FastAPI:
     logger.info("Starting XCart application...")
+    settings = get_settings()
 
     # Create FastAPI app
     app = FastAPI(
@@ -51,6 +87,8 @@ def create_app() -> FastAPI:
         redoc_url=settings.APP_REDOC_URL,
         root_path=settings.APP_ROOT_PATH,
         debug=settings.DEBUG,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # Add CORS middleware
@@ -72,12 +110,10 @@ def create_app() -> FastAPI:
     async def health_check():
         return {"status": "healthy"}
 
+    # Setup OpenTelemetry; middleware must be added before the app starts
+    setup_telemetry(app)
+
     return app
 
 
 app = create_app()
-
-# Setup OpenTelemetry
-setup_telemetry(app)
-
-logger.info("Application startup complete")
@@ -1,11 +1,13 @@
-from datetime import datetime, timedelta, UTC
+from threading import Lock
+from time import time
+import bcrypt
+from cachetools import TTLCache
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.core.logging import get_logger
 from app.core.telemetry import get_telemetry
@@ -13,19 +15,33 @@ from app.models import models
 from app.schemas import schemas
 
 router = APIRouter()
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
-)
+settings = get_settings()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.OAUTH2_TOKEN_URL)
 logger = get_logger("auth")
 
+_TOKEN_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# Validated tokens -> (user_id, exp), to skip JWT decoding on repeat requests
+_token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL_SECONDS
+)
+_token_cache_lock = Lock()
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(
+        password.encode(), bcrypt.gensalt(rounds=settings.PASSWORD_BCRYPT_ROUNDS)
+    ).decode()
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
 
 def create_access_token(data: dict) -> str:
-    expire = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # Integer epoch exp, which jose would otherwise convert from a datetime
     data_with_exp = data.copy()
-    data_with_exp["exp"] = expire
+    data_with_exp["exp"] = int(time()) + _TOKEN_TTL_SECONDS
     return jwt.encode(
         data_with_exp, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -34,6 +50,15 @@ def create_access_token(data: dict) -> str:
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ):
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at > time():
+            user = db.get(models.User, user_id)
+            if user:
+                return user
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -48,6 +73,9 @@ def get_current_user(
             logger.warning(f"User not found: {email}")
             raise HTTPException(status_code=401, detail="User not found")
 
+        if "exp" in payload:
+            with _token_cache_lock:
+                _token_cache[token] = (user.id, payload["exp"])
         return user
     except JWTError as e:
         logger.error(f"Token validation failed: {str(e)}")
@@ -61,7 +89,7 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
 
     db_user = models.User(
-        email=user.email, hashed_password=pwd_context.hash(user.password)
+        email=user.email, hashed_password=hash_password(user.password)
     )
     db.add(db_user)
     db.commit()
@@ -76,7 +104,7 @@ def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
     user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not pwd_context.verify(form_data.password, user.hashed_password):
+    if not user or not verify_password(form_data.password, user.hashed_password):
         logger.warning(f"Login failed: Invalid credentials for {form_data.username}")
         raise HTTPException(status_code=401, detail="Incorrect email or password")
 
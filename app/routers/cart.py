@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, joinedload
 from typing import List
 from app.core.database import get_db
 from app.core.logging import get_logger
-from app.core.telemetry import get_telemetry
-from app.core.config import settings
 from app.models import models
 from app.schemas import schemas
 from app.routers.auth import get_current_user
@@ -12,10 +11,33 @@ from app.routers.auth import get_current_user
 router = APIRouter()
 logger = get_logger("cart")
 
+
+def _product_dict(product: models.Product) -> dict:
+    """Serialize a product in the schemas.Product shape without validation"""
+    return {"id": product.id, "name": product.name, "price": product.price}
+
 @router.get("/", response_model=List[schemas.CartItem])
-def view_cart(current_user: models.User = Depends(get_current_user)):
+def view_cart(
+    current_user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
     logger.info(f"User {current_user.email} viewed their cart")
-    return current_user.cart_items
+    # Load items with their products in one query rather than one lazy load per row
+    cart_items = (
+        db.query(models.CartItem)
+        .options(joinedload(models.CartItem.product))
+        .filter(models.CartItem.user_id == current_user.id)
+        .all()
+    )
+    # Serialize the persisted rows directly; response_model only documents the shape
+    return ORJSONResponse([
+        {
+            "id": item.id,
+            "product": _product_dict(item.product),
+            "quantity": item.quantity,
+        }
+        for item in cart_items
+    ])
 
 @router.post("/add", response_model=schemas.CartItem)
 def add_to_cart(
@@ -36,10 +58,14 @@ def add_to_cart(
     )
     db.add(cart_item)
     db.commit()
-    db.refresh(cart_item)
     
     logger.info(f"User {current_user.email} added {item.quantity} of product {product.name} to cart")
-    return cart_item
+    # Built from values already in hand (the id is set on flush), skipping validation
+    return ORJSONResponse({
+        "id": cart_item.id,
+        "product": _product_dict(product),
+        "quantity": cart_item.quantity,
+    })
 
 @router.delete("/{item_id}")
 def remove_from_cart(
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, func, insert, select
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
 from app.core.logging import get_logger
-from app.core.config import settings
+from app.core.config import get_settings
 from app.models import models
 from app.schemas import schemas
 from app.routers.auth import get_current_user
@@ -17,17 +19,25 @@ logger = get_logger("orders")
 def place_order(
     current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)
 ):
-    cart_items = current_user.cart_items
-    if not cart_items:
+    # Total the cart in one query instead of lazy-loading each product
+    total_amount, items_count = (
+        db.query(
+            func.sum(models.CartItem.quantity * models.Product.price),
+            func.sum(models.CartItem.quantity),
+        )
+        .select_from(models.CartItem)
+        .join(models.CartItem.product)
+        .filter(models.CartItem.user_id == current_user.id)
+        .one()
+    )
+    if not items_count:
         logger.warning(
             f"User {current_user.email} tried to place order with empty cart"
         )
         raise HTTPException(status_code=400, detail="Cart is empty")
 
-    total_amount = sum(item.quantity * item.product.price for item in cart_items)
-    items_count = sum(item.quantity for item in cart_items)
-
     # Validate minimum order amount
+    settings = get_settings()
     if total_amount < settings.MIN_ORDER_AMOUNT:
         logger.warning(
             f"User {current_user.email} tried to place order below minimum amount (${total_amount:.2f})"
@@ -37,28 +47,38 @@ def place_order(
             detail=f"Order total must be at least ${settings.MIN_ORDER_AMOUNT:.2f}",
         )
 
-    order = models.Order(user_id=current_user.id, total_amount=total_amount)
-    db.add(order)
-
-    # Clear cart items
-    db.query(models.CartItem).filter(
-        models.CartItem.user_id == current_user.id
-    ).delete()
-
+    # Insert the order and clear the cart in the request's single transaction;
+    # RETURNING gives back everything the response needs, so no refresh
+    order = db.execute(
+        insert(models.Order)
+        .values(user_id=current_user.id, total_amount=total_amount)
+        .returning(models.Order.id, models.Order.total_amount)
+    ).one()
+    db.execute(
+        delete(models.CartItem)
+        .where(models.CartItem.user_id == current_user.id)
+        .execution_options(synchronize_session=False)
+    )
     db.commit()
-    db.refresh(order)
 
     # Track order metrics
-    if telemetry := get_telemetry():
-        telemetry.track_order(current_user.id, total_amount, items_count)
+    get_telemetry().track_order(current_user.id, total_amount, items_count)
 
     logger.info(
         f"User {current_user.email} placed order #{order.id} with {items_count} items, total: ${total_amount:.2f}"
     )
-    return order
+    return ORJSONResponse(order._asdict())
 
 
 @router.get("/", response_model=List[schemas.Order])
-def get_orders(current_user: models.User = Depends(get_current_user)):
+def get_orders(
+    current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)
+):
     logger.info(f"User {current_user.email} viewed their orders")
-    return current_user.orders
+    # Select just the response columns rather than lazy-loading User.orders
+    rows = db.execute(
+        select(models.Order.id, models.Order.total_amount)
+        .where(models.Order.user_id == current_user.id)
+        .order_by(models.Order.id)
+    ).all()
+    return ORJSONResponse([row._asdict() for row in rows])
@@ -1,27 +1,94 @@
-from fastapi import APIRouter, Depends, HTTPException
+from hashlib import blake2b
+from threading import Lock
+from typing import Callable, Hashable, List
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from app.core.config import get_settings
 from app.core.database import get_db
 from app.models import models
 from app.schemas import schemas
 
 router = APIRouter()
+settings = get_settings()
+
+# Serialized catalog responses -> (body, etag); products only change at seed time
+_product_cache = TTLCache(
+    maxsize=settings.PRODUCT_CACHE_MAXSIZE, ttl=settings.PRODUCT_CACHE_TTL_SECONDS
+)
+_product_cache_lock = Lock()
+
+_PRODUCT_COLUMNS = (models.Product.id, models.Product.name, models.Product.price)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header (weak tags, lists or *) against an ETag."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _cached_response(request: Request, key: Hashable, load: Callable[[], object]) -> Response:
+    """Serve a cached JSON body, answering 304 when the client's ETag matches."""
+    with _product_cache_lock:
+        cached = _product_cache.get(key)
+    if cached is None:
+        data = load()
+        body = orjson.dumps(data)
+        cached = (body, f'"{blake2b(body, digest_size=8).hexdigest()}"')
+        # Empty pages (offsets past the catalog) are not cached, so scanning
+        # offsets cannot push real entries out
+        if data:
+            with _product_cache_lock:
+                _product_cache[key] = cached
+
+    body, etag = cached
+    headers = {"ETag": etag}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.get("/", response_model=List[schemas.Product])
-def get_products(db: Session = Depends(get_db)):
+def get_products(
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
     """
-    Get all available products in the shop
+    Get a page of available products in the shop
     """
-    return db.query(models.Product).all()
+    def load():
+        # Plain column tuples instead of hydrated ORM objects
+        rows = db.execute(
+            select(*_PRODUCT_COLUMNS)
+            .order_by(models.Product.id)
+            .offset(offset)
+            .limit(limit)
+        ).all()
+        return [row._asdict() for row in rows]
+
+    return _cached_response(request, ("list", limit, offset), load)
 
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: int, db: Session = Depends(get_db)):
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Get a specific product by ID
     """
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    def load():
+        row = db.execute(
+            select(*_PRODUCT_COLUMNS).where(models.Product.id == product_id)
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return row._asdict()
+
+    return _cached_response(request, ("item", product_id), load)